@@ -1,8 +1,9 @@
 import numpy as np
 import pyopencl as cl
-import pyopencl.clmath  # noqa
 
+from pytools import memoize_in
 from arraycontext import thaw
+from meshmode.dof_array import DOFArray
 from meshmode.array_context import PyOpenCLArrayContext
 from meshmode.discretization import Discretization
 from meshmode.discretization.poly_element import \
@@ -10,6 +11,7 @@ from meshmode.discretization.poly_element import \
 
 from pytential import bind, sym
 from pytential.target import PointsTarget
+from sumpy.kernel import HelmholtzKernel
 
 # {{{ set some constants for use below
 
@@ -23,6 +25,15 @@ k = 0
 
 # }}}
 
+# {{{ describe layer potential
+
+# The symbolic operator does not depend on the geometry, so it is built once
+# and shared by all timing runs.
+kernel = HelmholtzKernel(2)
+sym_op = sym.S(kernel, sym.var("sigma"), k=sym.var("k"), qbx_forced_limit=+1)
+
+# }}}
+
 
 def make_mesh(nx, ny, visualize=False):
     from meshmode.mesh.generation import ellipse, make_curve_mesh
@@ -33,17 +44,34 @@ def make_mesh(nx, ny, visualize=False):
             np.linspace(0, 1, nelements+1),
             mesh_order)
 
-    from meshmode.mesh.processing import affine_map, merge_disjoint_meshes
+    # Place nx*ny scaled copies of the base mesh on a grid. All copies are
+    # built at once by broadcasting, instead of mapping and merging them
+    # one by one.
     dx = 2 / nx
-    meshes = [
-            affine_map(
-                base_mesh,
-                A=np.diag([dx*0.25, dx*0.25]),
-                b=np.array([dx*(ix-nx/2), dx*(iy-ny/2)]))
-            for ix in range(nx)
-            for iy in range(ny)]
-
-    mesh = merge_disjoint_meshes(meshes, single_group=True)
+    scale = dx*0.25
+    ix, iy = np.meshgrid(np.arange(nx), np.arange(ny), indexing="ij")
+    shifts = dx*np.stack([ix.ravel() - nx/2, iy.ravel() - ny/2])
+    ncopies = shifts.shape[1]
+
+    base_group, = base_mesh.groups
+    vertices = (
+            scale*base_mesh.vertices[:, np.newaxis, :]
+            + shifts[:, :, np.newaxis]).reshape(base_mesh.ambient_dim, -1)
+    nodes = (
+            scale*base_group.nodes[:, np.newaxis]
+            + shifts[:, :, np.newaxis, np.newaxis]
+            ).reshape(base_mesh.ambient_dim, -1, base_group.nunit_nodes)
+    vertex_indices = (
+            base_group.vertex_indices
+            + base_mesh.nvertices * np.arange(
+                ncopies, dtype=base_group.vertex_indices.dtype
+                ).reshape(-1, 1, 1)
+            ).reshape(-1, base_group.vertex_indices.shape[-1])
+
+    from meshmode.mesh import Mesh
+    mesh = Mesh(vertices,
+            [base_group.copy(vertex_indices=vertex_indices, nodes=nodes)],
+            is_conforming=base_mesh.is_conforming)
 
     if visualize:
         from meshmode.mesh.visualization import draw_curve
@@ -54,13 +82,31 @@ def make_mesh(nx, ny, visualize=False):
     return mesh
 
 
-def timing_run(nx, ny, visualize=False):
-    import logging
-    logging.basicConfig(level=logging.WARNING)  # INFO for more progress info
+def make_angular_mode_density(actx, discr, mode_nr):
+    """Evaluates ``cos(mode_nr * atan2(y, x))`` on the nodes of *discr* with
+    a single fused kernel per element group.
+    """
+    @memoize_in(actx, (make_angular_mode_density, "knl"))
+    def knl():
+        from pyopencl.elementwise import ElementwiseKernel
+        return ElementwiseKernel(actx.context,
+                "double *sigma, double const *x, double const *y, int mode_nr",
+                "sigma[i] = cos(mode_nr * atan2(y[i], x[i]))",
+                "angular_mode_density")
 
-    cl_ctx = cl.create_some_context()
-    queue = cl.CommandQueue(cl_ctx)
-    actx = PyOpenCLArrayContext(queue, force_device_scalars=True)
+    nodes = thaw(discr.nodes(), actx)
+
+    sigma = []
+    for x, y in zip(nodes[0], nodes[1]):
+        grp_sigma = actx.empty(x.shape, x.dtype)
+        knl()(grp_sigma, x, y, mode_nr, queue=actx.queue)
+        sigma.append(grp_sigma)
+
+    return DOFArray(actx, tuple(sigma))
+
+
+def timing_run(actx, nx, ny, nwarmup_runs=2, visualize=False):
+    queue = actx.queue
 
     mesh = make_mesh(nx=nx, ny=ny, visualize=visualize)
 
@@ -94,56 +140,23 @@ def timing_run(nx, ny, visualize=False):
     places = GeometryCollection(places, auto_where="qbx")
     density_discr = places.get_discretization("qbx")
 
-    # {{{ describe bvp
-
-    from sumpy.kernel import HelmholtzKernel
-    kernel = HelmholtzKernel(2)
-
-    sigma_sym = sym.var("sigma")
-    sqrt_w = sym.sqrt_jac_q_weight(2)
-    inv_sqrt_w_sigma = sym.cse(sigma_sym/sqrt_w)
-
-    # Brakhage-Werner parameter
-    alpha = 1j
-
-    # -1 for interior Dirichlet
-    # +1 for exterior Dirichlet
-    loc_sign = +1
-
-    k_sym = sym.var("k")
-    S_sym = sym.S(kernel, inv_sqrt_w_sigma, k=k_sym, qbx_forced_limit=+1)
-    D_sym = sym.D(kernel, inv_sqrt_w_sigma, k=k_sym, qbx_forced_limit="avg")
-    bdry_op_sym = -loc_sign*0.5*sigma_sym + sqrt_w*(alpha*S_sym + D_sym)
-
-    # }}}
-
-    bound_op = bind(places, bdry_op_sym)
-
-    # {{{ fix rhs and solve
+    # {{{ set up density
 
     mode_nr = 3
-
-    nodes = thaw(density_discr.nodes(), actx)
-    angle = actx.np.arctan2(nodes[1], nodes[0])
-
-    sigma = actx.np.cos(mode_nr*angle)
+    sigma = make_angular_mode_density(actx, density_discr, mode_nr)
 
     # }}}
 
     # {{{ postprocess/visualize
 
-    repr_kwargs = dict(k=sym.var("k"), qbx_forced_limit=+1)
-
-    sym_op = sym.S(kernel, sym.var("sigma"), **repr_kwargs)
     bound_op = bind(places, sym_op)
 
-    print("FMM WARM-UP RUN 1: %5d elements" % mesh.nelements)
-    bound_op(actx, sigma=sigma, k=k)
-    queue.finish()
-
-    print("FMM WARM-UP RUN 2: %5d elements" % mesh.nelements)
-    bound_op(actx, sigma=sigma, k=k)
-    queue.finish()
+    # NOTE: the warm-up runs and the timed run are deliberately kept sequential
+    # on a single queue, since overlapping them would skew the measured time.
+    for irun in range(nwarmup_runs):
+        print("FMM WARM-UP RUN %d: %5d elements" % (irun + 1, mesh.nelements))
+        bound_op(actx, sigma=sigma, k=k)
+        queue.finish()
 
     from time import time
     t_start = time()
@@ -182,6 +195,13 @@ def timing_run(nx, ny, visualize=False):
 
 
 if __name__ == "__main__":
+    import logging
+    logging.basicConfig(level=logging.WARNING)  # INFO for more progress info
+
+    cl_ctx = cl.create_some_context()
+    queue = cl.CommandQueue(cl_ctx)
+    actx = PyOpenCLArrayContext(queue, force_device_scalars=True)
+
     grid_sizes = [
             (3, 3),
             (3, 4),
@@ -203,8 +223,10 @@ if __name__ == "__main__":
     from pytools.convergence import EOCRecorder
     eoc = EOCRecorder()
 
-    for nx, ny in grid_sizes:
-        npoints, t_elapsed = timing_run(nx, ny)
+    for i, (nx, ny) in enumerate(grid_sizes):
+        # kernels are compiled during the first run and cached on *actx*
+        npoints, t_elapsed = timing_run(actx, nx, ny,
+                nwarmup_runs=2 if i == 0 else 1)
         eoc.add_data_point(npoints, t_elapsed)
     print(eoc.pretty_print(
         abscissa_label="Elements",
@@ -524,9 +524,7 @@ class QBXLayerPotentialSource(LayerPotentialSourceBase):
 
     # {{{ fmm-based execution
 
-    @memoize_method
     def _tree_indep_data_for_wrangler(self, source_kernels, target_kernels):
-        from functools import partial
         base_kernel = single_valued(kernel.get_base_kernel() for
             kernel in source_kernels)
         mpole_expn_class = \
@@ -534,36 +532,50 @@ class QBXLayerPotentialSource(LayerPotentialSourceBase):
         local_expn_class = \
                 self.expansion_factory.get_local_expansion_class(base_kernel)
 
-        fmm_mpole_factory = partial(mpole_expn_class, base_kernel)
-        fmm_local_factory = partial(local_expn_class, base_kernel)
-        qbx_local_factory = partial(local_expn_class, base_kernel)
-
-        if self.fmm_backend == "sumpy":
-            from pytential.qbx.fmm import \
-                    QBXSumpyTreeIndependentDataForWrangler
-            return QBXSumpyTreeIndependentDataForWrangler(
-                    self.cl_context,
-                    fmm_mpole_factory, fmm_local_factory, qbx_local_factory,
-                    target_kernels=target_kernels, source_kernels=source_kernels)
-
-        elif self.fmm_backend == "fmmlib":
-            source_kernel, = source_kernels
-            target_kernels_new = [
-                target_kernel.replace_base_kernel(source_kernel) for
-                target_kernel in target_kernels
-            ]
-            from pytential.qbx.fmmlib import \
-                    QBXFMMLibTreeIndependentDataForWrangler
-            return QBXFMMLibTreeIndependentDataForWrangler(
-                    self.cl_context,
-                    multipole_expansion_factory=fmm_mpole_factory,
-                    local_expansion_factory=fmm_local_factory,
-                    qbx_local_expansion_factory=qbx_local_factory,
-                    target_kernels=target_kernels_new,
-                    _use_target_specific_qbx=self._use_target_specific_qbx)
+        # NOTE: the tree-independent data does not depend on the geometry, so
+        # it is shared by all sources using the same array context (e.g. the
+        # copies made during refinement) to reuse the kernels it builds.
+        @memoize_in(self._setup_actx, (
+                QBXLayerPotentialSource, "tree_indep_data_for_wrangler"))
+        def make_tree_indep_data(fmm_backend,
+                mpole_expn_class, local_expn_class,
+                source_kernels, target_kernels, use_target_specific_qbx):
+            from functools import partial
+            fmm_mpole_factory = partial(mpole_expn_class, base_kernel)
+            fmm_local_factory = partial(local_expn_class, base_kernel)
+            qbx_local_factory = partial(local_expn_class, base_kernel)
+
+            if fmm_backend == "sumpy":
+                from pytential.qbx.fmm import \
+                        QBXSumpyTreeIndependentDataForWrangler
+                return QBXSumpyTreeIndependentDataForWrangler(
+                        self.cl_context,
+                        fmm_mpole_factory, fmm_local_factory, qbx_local_factory,
+                        target_kernels=target_kernels,
+                        source_kernels=source_kernels)
+
+            elif fmm_backend == "fmmlib":
+                source_kernel, = source_kernels
+                target_kernels_new = [
+                    target_kernel.replace_base_kernel(source_kernel) for
+                    target_kernel in target_kernels
+                ]
+                from pytential.qbx.fmmlib import \
+                        QBXFMMLibTreeIndependentDataForWrangler
+                return QBXFMMLibTreeIndependentDataForWrangler(
+                        self.cl_context,
+                        multipole_expansion_factory=fmm_mpole_factory,
+                        local_expansion_factory=fmm_local_factory,
+                        qbx_local_expansion_factory=qbx_local_factory,
+                        target_kernels=target_kernels_new,
+                        _use_target_specific_qbx=use_target_specific_qbx)
+
+            else:
+                raise ValueError(f"invalid FMM backend: {fmm_backend}")
 
-        else:
-            raise ValueError(f"invalid FMM backend: {self.fmm_backend}")
+        return make_tree_indep_data(self.fmm_backend,
+                mpole_expn_class, local_expn_class,
+                source_kernels, target_kernels, self._use_target_specific_qbx)
 
     def get_target_discrs_and_qbx_sides(self, insn, bound_expr):
         """Build the list of unique target discretizations used by the
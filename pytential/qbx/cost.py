@@ -833,9 +833,8 @@ class _PythonQBXCostModel(AbstractQBXCostModel, _PythonFMMCostModel):
 
         np2qbxl = np.zeros(len(traversal.target_boxes), dtype=np.float64)
 
-        for tgt_icenter in global_qbx_centers:
-            itgt_box = qbx_center_to_target_box[tgt_icenter]
-            np2qbxl[itgt_box] += ndirect_sources_per_target_box[itgt_box]
+        itgt_boxes = qbx_center_to_target_box[global_qbx_centers]
+        np.add.at(np2qbxl, itgt_boxes, ndirect_sources_per_target_box[itgt_boxes])
 
         return np2qbxl * p2qbxl_cost
 
@@ -847,12 +846,13 @@ class _PythonQBXCostModel(AbstractQBXCostModel, _PythonFMMCostModel):
         traversal = geo_data.traversal()
 
         neval_tsqbx = np.zeros(len(traversal.target_boxes), dtype=np.float64)
-        for tgt_icenter in global_qbx_centers:
-            start, end = center_to_targets_starts[tgt_icenter:tgt_icenter + 2]
-            itgt_box = qbx_center_to_target_box[tgt_icenter]
-            neval_tsqbx[itgt_box] += (
-                    ndirect_sources_per_target_box[itgt_box] * (end - start)
-            )
+
+        itgt_boxes = qbx_center_to_target_box[global_qbx_centers]
+        ntargets_per_center = (
+                center_to_targets_starts[global_qbx_centers + 1]
+                - center_to_targets_starts[global_qbx_centers])
+        np.add.at(neval_tsqbx, itgt_boxes,
+                ndirect_sources_per_target_box[itgt_boxes] * ntargets_per_center)
 
         return neval_tsqbx * p2p_tsqbx_cost
 
@@ -864,27 +864,26 @@ class _PythonQBXCostModel(AbstractQBXCostModel, _PythonFMMCostModel):
         ntarget_boxes = len(traversal.target_boxes)
         nm2qbxl = np.zeros(ntarget_boxes, dtype=np.float64)
 
+        containing_tgt_boxes = qbx_center_to_target_box[global_qbx_centers]
+
         for isrc_level, sep_smaller_list in enumerate(
                 traversal.from_sep_smaller_by_level):
 
             qbx_center_to_target_box_source_level = \
                 geo_data.qbx_center_to_target_box_source_level(isrc_level)
 
-            for tgt_icenter in global_qbx_centers:
-                icontaining_tgt_box = qbx_center_to_target_box_source_level[
-                    tgt_icenter
-                ]
-
-                if icontaining_tgt_box == -1:
-                    continue
-
-                start = sep_smaller_list.starts[icontaining_tgt_box]
-                stop = sep_smaller_list.starts[icontaining_tgt_box + 1]
+            icontaining_tgt_boxes = qbx_center_to_target_box_source_level[
+                global_qbx_centers
+            ]
+            has_tgt_box = icontaining_tgt_boxes != -1
+            icontaining_tgt_boxes = icontaining_tgt_boxes[has_tgt_box]
 
-                containing_tgt_box = qbx_center_to_target_box[tgt_icenter]
+            nsources = (
+                    sep_smaller_list.starts[icontaining_tgt_boxes + 1]
+                    - sep_smaller_list.starts[icontaining_tgt_boxes])
 
-                nm2qbxl[containing_tgt_box] += (
-                        (stop - start) * m2qbxl_cost[isrc_level])
+            np.add.at(nm2qbxl, containing_tgt_boxes[has_tgt_box],
+                    nsources * m2qbxl_cost[isrc_level])
 
         return nm2qbxl
 
@@ -897,10 +896,9 @@ class _PythonQBXCostModel(AbstractQBXCostModel, _PythonFMMCostModel):
         ntarget_boxes = len(traversal.target_boxes)
         nl2qbxl = np.zeros(ntarget_boxes, dtype=np.float64)
 
-        for tgt_icenter in global_qbx_centers:
-            itgt_box = qbx_center_to_target_box[tgt_icenter]
-            tgt_ibox = traversal.target_boxes[itgt_box]
-            nl2qbxl[itgt_box] += l2qbxl_cost[tree.box_levels[tgt_ibox]]
+        itgt_boxes = qbx_center_to_target_box[global_qbx_centers]
+        tgt_iboxes = traversal.target_boxes[itgt_boxes]
+        np.add.at(nl2qbxl, itgt_boxes, l2qbxl_cost[tree.box_levels[tgt_iboxes]])
 
         return nl2qbxl
 
@@ -913,10 +911,10 @@ class _PythonQBXCostModel(AbstractQBXCostModel, _PythonFMMCostModel):
         ntarget_boxes = len(traversal.target_boxes)
         neval_qbxl = np.zeros(ntarget_boxes, dtype=np.float64)
 
-        for src_icenter in global_qbx_centers:
-            start, end = center_to_targets_starts[src_icenter:src_icenter+2]
-            icontaining_tgt_box = qbx_center_to_target_box[src_icenter]
-            neval_qbxl[icontaining_tgt_box] += (end - start)
+        icontaining_tgt_boxes = qbx_center_to_target_box[global_qbx_centers]
+        np.add.at(neval_qbxl, icontaining_tgt_boxes,
+                center_to_targets_starts[global_qbx_centers + 1]
+                - center_to_targets_starts[global_qbx_centers])
 
         return neval_qbxl * qbxl2p_cost
 
@@ -0,0 +1,53 @@
+import pytest
+
+
+# {{{ shared array contexts
+
+@pytest.fixture(scope="module")
+def _shared_actx_cache():
+    return {}
+
+
+@pytest.fixture
+def shared_actx(actx_factory, _shared_actx_cache):
+    """An array context that is shared by all tests in a module that use the
+    same *actx_factory*. This allows reusing kernels, code containers and other
+    data cached on the array context across test cases.
+
+    Each :mod:`pytest-xdist` worker process creates its own array contexts,
+    so modules using this fixture can still be run with ``pytest -n auto``.
+    """
+
+    key = (type(actx_factory), actx_factory.device)
+    try:
+        return _shared_actx_cache[key]
+    except KeyError:
+        actx = _shared_actx_cache[key] = actx_factory()
+        return actx
+
+# }}}
+
+
+# {{{ xdist grouping
+
+def pytest_collection_modifyitems(config, items):
+    """Places test cases that share a geometry into the same
+    :mod:`pytest-xdist` group, so that ``pytest -n auto --dist loadgroup``
+    runs them on the same worker and they can reuse its cached meshes and
+    refined geometries.
+    """
+
+    for item in items:
+        callspec = getattr(item, "callspec", None)
+        if callspec is None:
+            continue
+
+        geometry = getattr(callspec.params.get("case"), "geometry", None)
+        if geometry is None:
+            continue
+
+        item.add_marker(pytest.mark.xdist_group(geometry.mesh_name))
+
+# }}}
+
+# vim: fdm=marker
@@ -28,7 +28,6 @@ from functools import partial
 from dataclasses import dataclass
 
 import numpy as np
-import numpy.linalg as la
 
 from arraycontext import flatten
 from pytential import GeometryCollection, bind, sym
@@ -55,30 +54,106 @@ FAR_TARGET_DIST_FROM_SOURCE = 10
 # {{{ source refinement checker
 
 @dataclass
-class ElementInfo:
-    element_nr: int
+class ElementGroupInfo:
+    element_slice: slice
     discr_slice: slice
+    nelements: int
+    nunit_dofs: int
 
+    @property
+    def element_nrs(self):
+        return np.arange(self.element_slice.start, self.element_slice.stop)
 
-def iter_elements(discr):
+    def by_element(self, ary):
+        """Reshapes the last axis of *ary* to ``(nelements, nunit_dofs)``."""
+        return ary[..., self.discr_slice].reshape(
+                *ary.shape[:-1], self.nelements, self.nunit_dofs)
+
+
+def iter_element_groups(discr):
+    element_nr_base = 0
     discr_nodes_idx = 0
-    element_nr = 0
 
     for discr_group in discr.groups:
-        start = element_nr
-        for element_nr in range(start, start + discr_group.nelements):
-            yield ElementInfo(
-                element_nr=element_nr,
-                discr_slice=slice(discr_nodes_idx,
-                    discr_nodes_idx + discr_group.nunit_dofs))
+        yield ElementGroupInfo(
+                element_slice=slice(
+                    element_nr_base, element_nr_base + discr_group.nelements),
+                discr_slice=slice(
+                    discr_nodes_idx, discr_nodes_idx + discr_group.ndofs),
+                nelements=discr_group.nelements,
+                nunit_dofs=discr_group.nunit_dofs)
+
+        element_nr_base += discr_group.nelements
+        discr_nodes_idx += discr_group.ndofs
+
+
+def bounding_balls(points):
+    """
+    :arg points: an array of shape ``(ambient_dim, nelements, npoints)``.
+    :returns: a tuple ``(centroids, radii)`` of balls containing the points
+        of each element.
+    """
+    centroids = np.mean(points, axis=-1)
+    radii = np.sqrt(np.max(
+        np.sum((points - centroids[..., np.newaxis])**2, axis=0),
+        axis=-1))
+
+    return centroids, radii
+
+
+def element_min_distances_squared(centers, nodes, threshold,
+        max_block_size=2**22):
+    """
+    :arg centers: an array of shape ``(ambient_dim, ncenter_elements, ncenters)``.
+    :arg nodes: an array of shape ``(ambient_dim, nnode_elements, nnodes)``.
+    :arg threshold: an array broadcastable to
+        ``(ncenter_elements, nnode_elements)``.
+    :returns: an array of shape ``(ncenter_elements, nnode_elements)`` with the
+        minimum squared distance between the centers and the nodes of each
+        pair of elements. Pairs of elements whose bounding balls are at least
+        *threshold* apart are not computed and are set to infinity.
+    """
+    ambient_dim, ncenter_elements, ncenters = centers.shape
+    _, nnode_elements, nnodes = nodes.shape
+
+    # {{{ find candidate pairs
+
+    center_centroids, center_radii = bounding_balls(centers)
+    node_centroids, node_radii = bounding_balls(nodes)
+
+    centroid_dist = np.sqrt(sum(
+        (center_centroids[iaxis, :, np.newaxis]
+            - node_centroids[iaxis, np.newaxis, :])**2
+        for iaxis in range(ambient_dim)))
+    dist_lower_bound = (
+            centroid_dist - center_radii[:, np.newaxis] - node_radii)
+
+    icenter_elements, inode_elements = np.nonzero(dist_lower_bound < threshold)
 
-            discr_nodes_idx += discr_group.nunit_dofs
+    # }}}
 
+    # process the candidate pairs in blocks to bound the size of the
+    # (block, ncenters, nnodes) temporary
+    block_size = max(1, max_block_size // (ncenters * nnodes))
 
-def run_source_refinement_test(actx_factory, mesh, order,
-        helmholtz_k=None, visualize=False):
-    actx = actx_factory()
+    dist_squared = np.full((ncenter_elements, nnode_elements), np.inf)
+    for start in range(0, len(icenter_elements), block_size):
+        block_icenter_elements = icenter_elements[start:start + block_size]
+        block_inode_elements = inode_elements[start:start + block_size]
+
+        block_dist_squared = sum(
+                (centers[iaxis, block_icenter_elements, :, np.newaxis]
+                    - nodes[iaxis, block_inode_elements, np.newaxis, :])**2
+                for iaxis in range(ambient_dim))
+
+        dist_squared[block_icenter_elements, block_inode_elements] = (
+                block_dist_squared.min(axis=(-2, -1)))
+
+    return dist_squared
 
+
+def run_source_refinement_test(actx, mesh, order,
+        helmholtz_k=None, visualize=False):
     # {{{ initial geometry
 
     from meshmode.discretization import Discretization
@@ -121,12 +196,13 @@ def run_source_refinement_test(actx_factory, mesh, order,
             flatten(quad_stage2_density_discr.nodes(), actx)
             ).reshape(ambient_dim, -1)
 
-    int_centers = actx.to_numpy(flatten(
-        bind(places, sym.expansion_centers(ambient_dim, -1))(actx), actx)
-        ).reshape(ambient_dim, -1)
-    ext_centers = actx.to_numpy(flatten(
-        bind(places, sym.expansion_centers(ambient_dim, +1))(actx), actx)
-        ).reshape(ambient_dim, -1)
+    # transfer both sides at once to avoid a host round-trip per side
+    int_centers, ext_centers = actx.to_numpy(flatten(
+        bind(places, sym.make_obj_array([
+            *sym.expansion_centers(ambient_dim, -1),
+            *sym.expansion_centers(ambient_dim, +1),
+            ]))(actx), actx)
+        ).reshape(2, ambient_dim, -1)
     expansion_radii = actx.to_numpy(flatten(
         bind(places, sym.expansion_radii(ambient_dim))(actx), actx)
         )
@@ -145,67 +221,59 @@ def run_source_refinement_test(actx_factory, mesh, order,
 
     # {{{ check if satisfying criteria
 
-    def check_disk_undisturbed_by_sources(centers_panel, sources_panel):
-        if centers_panel.element_nr == sources_panel.element_nr:
-            # Same panel
-            return
-
-        my_int_centers = int_centers[:, centers_panel.discr_slice]
-        my_ext_centers = ext_centers[:, centers_panel.discr_slice]
-        all_centers = np.append(my_int_centers, my_ext_centers, axis=-1)
-
-        nodes = stage1_density_nodes[:, sources_panel.discr_slice]
-
-        # =distance(centers of panel 1, panel 2)
-        dist = (
-            la.norm((
-                    all_centers[..., np.newaxis]
-                    - nodes[:, np.newaxis, ...]).T,
+    for centers_grp in iter_element_groups(stage1_density_discr):
+        all_centers = np.append(
+                centers_grp.by_element(int_centers),
+                centers_grp.by_element(ext_centers),
                 axis=-1)
-            .min())
+        rad = centers_grp.by_element(expansion_radii).max(axis=-1)
 
         # Criterion:
         # A center cannot be closer to another panel than to its originating
         # panel.
 
-        rad = expansion_radii[centers_panel.discr_slice]
-        assert (dist >= rad * (1-expansion_disturbance_tolerance)).all(), \
-                (dist, rad, centers_panel.element_nr, sources_panel.element_nr)
-
-    def check_sufficient_quadrature_resolution(centers_panel, sources_panel):
-        dz_radius = source_danger_zone_radii[sources_panel.element_nr]
+        min_dist = rad[:, np.newaxis] * (1-expansion_disturbance_tolerance)
 
-        my_int_centers = int_centers[:, centers_panel.discr_slice]
-        my_ext_centers = ext_centers[:, centers_panel.discr_slice]
-        all_centers = np.append(my_int_centers, my_ext_centers, axis=-1)
+        for sources_grp in iter_element_groups(stage1_density_discr):
+            # =distance(centers of panel 1, panel 2)**2
+            dist_squared = element_min_distances_squared(
+                    all_centers,
+                    sources_grp.by_element(stage1_density_nodes),
+                    min_dist)
 
-        nodes = quad_stage2_density_nodes[:, sources_panel.discr_slice]
+            # Same panel
+            dist_squared[centers_grp.element_nrs[:, np.newaxis]
+                    == sources_grp.element_nrs] = np.inf
 
-        # =distance(centers of panel 1, panel 2)
-        dist = (
-            la.norm((
-                    all_centers[..., np.newaxis]
-                    - nodes[:, np.newaxis, ...]).T,
-                axis=-1)
-            .min())
+            is_undisturbed = dist_squared >= min_dist**2
+            assert is_undisturbed.all(), [
+                    (np.sqrt(dist_squared[i, j]), rad[i],
+                        centers_grp.element_nrs[i], sources_grp.element_nrs[j])
+                    for i, j in np.argwhere(~is_undisturbed)]
 
         # Criterion:
         # The quadrature contribution from each panel is as accurate
         # as from the center's own source panel.
-        assert dist >= dz_radius, \
-                (dist, dz_radius, centers_panel.element_nr, sources_panel.element_nr)
 
-    def check_quad_res_to_helmholtz_k_ratio(panel):
-        # Check wavenumber to panel size ratio.
-        assert quad_res[panel.element_nr] * helmholtz_k <= 5
+        for sources_grp in iter_element_groups(quad_stage2_density_discr):
+            dz_radius = source_danger_zone_radii[sources_grp.element_slice]
+
+            # =distance(centers of panel 1, panel 2)**2
+            dist_squared = element_min_distances_squared(
+                    all_centers,
+                    sources_grp.by_element(quad_stage2_density_nodes),
+                    dz_radius)
 
-    for panel_1 in iter_elements(stage1_density_discr):
-        for panel_2 in iter_elements(stage1_density_discr):
-            check_disk_undisturbed_by_sources(panel_1, panel_2)
-        for panel_2 in iter_elements(quad_stage2_density_discr):
-            check_sufficient_quadrature_resolution(panel_1, panel_2)
-        if helmholtz_k is not None:
-            check_quad_res_to_helmholtz_k_ratio(panel_1)
+            is_resolved = dist_squared >= dz_radius**2
+            assert is_resolved.all(), [
+                    (np.sqrt(dist_squared[i, j]), dz_radius[j],
+                        centers_grp.element_nrs[i], sources_grp.element_nrs[j])
+                    for i, j in np.argwhere(~is_resolved)]
+
+    if helmholtz_k is not None:
+        # Check wavenumber to panel size ratio.
+        is_resolved = quad_res * helmholtz_k <= 5
+        assert is_resolved.all(), np.flatnonzero(~is_resolved)
 
     # }}}
 
@@ -216,30 +284,30 @@ def run_source_refinement_test(actx_factory, mesh, order,
     ("20-to-1 ellipse", partial(mgen.ellipse, 20), 100),
     ("horseshoe", horseshoe, 64),
     ])
-def test_source_refinement_2d(actx_factory, curve_name, curve_f, nelements):
+def test_source_refinement_2d(shared_actx, curve_name, curve_f, nelements):
     helmholtz_k = 10
     order = 8
 
     mesh = mgen.make_curve_mesh(curve_f, np.linspace(0, 1, nelements+1), order)
-    run_source_refinement_test(actx_factory, mesh, order, helmholtz_k)
+    run_source_refinement_test(shared_actx, mesh, order, helmholtz_k)
 
 
 @pytest.mark.parametrize(("surface_name", "surface_f", "order"), [
     ("sphere", partial(mgen.generate_sphere, 1), 4),
     ("torus", partial(mgen.generate_torus, 3, 1, n_minor=10, n_major=7), 6),
     ])
-def test_source_refinement_3d(actx_factory, surface_name, surface_f, order):
+def test_source_refinement_3d(shared_actx, surface_name, surface_f, order):
     mesh = surface_f(order=order)
-    run_source_refinement_test(actx_factory, mesh, order)
+    run_source_refinement_test(shared_actx, mesh, order)
 
 
 @pytest.mark.parametrize(("curve_name", "curve_f", "nelements"), [
     ("20-to-1 ellipse", partial(mgen.ellipse, 20), 100),
     ("horseshoe", horseshoe, 64),
     ])
-def test_target_association(actx_factory, curve_name, curve_f, nelements,
+def test_target_association(shared_actx, curve_name, curve_f, nelements,
         visualize=False):
-    actx = actx_factory()
+    actx = shared_actx
 
     # {{{ generate lpot source
 
@@ -269,35 +337,38 @@ def test_target_association(actx_factory, curve_name, curve_f, nelements,
     ambient_dim = places.ambient_dim
     dd = places.auto_source.to_stage1()
 
-    centers = actx.to_numpy(flatten(
+    centers = flatten(
         bind(places,
             sym.interleaved_expansion_centers(ambient_dim, dofdesc=dd))(actx),
-        actx)).reshape(ambient_dim, -1)
+        actx).reshape(ambient_dim, -1)
 
     density_discr = places.get_discretization(dd.geometry)
 
-    noise = actx.to_numpy(
-            rng.uniform(actx.queue, density_discr.ndofs,
-                dtype=np.float64, a=0.01, b=1.0)
-            )
+    noise = rng.uniform(actx.queue, density_discr.ndofs,
+            dtype=np.float64, a=0.01, b=1.0)
 
-    tunnel_radius = actx.to_numpy(flatten(
+    tunnel_radius = flatten(
         bind(places, sym._close_target_tunnel_radii(ambient_dim, dofdesc=dd))(actx),
-        actx))
-
-    def targets_from_sources(sign, dist, dim=2):
-        nodes = actx.to_numpy(flatten(
-                bind(places, sym.nodes(dim, dofdesc=dd))(actx).as_vector(), actx)
-                ).reshape(dim, -1)
-        normals = actx.to_numpy(flatten(
-                bind(places, sym.normal(dim, dofdesc=dd))(actx).as_vector(), actx)
-                ).reshape(dim, -1)
-
-        return actx.from_numpy(nodes + normals * sign * dist)
+        actx)
+
+    # evaluate nodes and normals once and keep them on the device
+    nodes_and_normals = flatten(
+        bind(places, sym.make_obj_array([
+            *sym.nodes(ambient_dim, dofdesc=dd).as_vector(),
+            *sym.normal(ambient_dim, dofdesc=dd).as_vector(),
+            ]))(actx), actx).reshape(2, ambient_dim, -1)
+    nodes = nodes_and_normals[0]
+    normals = nodes_and_normals[1]
+
+    def targets_from_sources(sign, dist):
+        return actx.np.stack([
+            nodes[iaxis] + normals[iaxis] * sign * dist
+            for iaxis in range(ambient_dim)])
 
     from pytential.target import PointsTarget
-    int_targets = PointsTarget(targets_from_sources(-1, noise * tunnel_radius))
-    ext_targets = PointsTarget(targets_from_sources(+1, noise * tunnel_radius))
+    close_target_dist = noise * tunnel_radius
+    int_targets = PointsTarget(targets_from_sources(-1, close_target_dist))
+    ext_targets = PointsTarget(targets_from_sources(+1, close_target_dist))
     far_targets = PointsTarget(targets_from_sources(+1, FAR_TARGET_DIST_FROM_SOURCE))
 
     # Create target discretizations.
@@ -334,23 +405,19 @@ def test_target_association(actx_factory, curve_name, curve_f, nelements,
     code_container = TargetAssociationCodeContainer(
             actx, TreeCodeContainer(actx))
 
-    target_assoc = (associate_targets_to_qbx_centers(
+    target_assoc = associate_targets_to_qbx_centers(
             places,
             places.auto_source,
             code_container.get_wrangler(actx),
             target_discrs,
             target_association_tolerance=1e-10)
-        .get(queue=actx.queue))
 
-    expansion_radii = actx.to_numpy(flatten(
+    expansion_radii = flatten(
             bind(places, sym.expansion_radii(ambient_dim,
                 granularity=sym.GRANULARITY_CENTER))(actx), actx)
-            )
-    surf_targets = actx.to_numpy(
-            flatten(density_discr.nodes(), actx)
-            ).reshape(ambient_dim, -1)
-    int_targets = actx.to_numpy(int_targets.nodes())
-    ext_targets = actx.to_numpy(ext_targets.nodes())
+    surf_targets = nodes
+    int_targets = int_targets.nodes()
+    ext_targets = ext_targets.nodes()
 
     def visualize_curve_and_assoc():
         import matplotlib.pyplot as plt
@@ -358,21 +425,23 @@ def test_target_association(actx_factory, curve_name, curve_f, nelements,
 
         draw_curve(density_discr.mesh)
 
-        targets = int_targets
+        centers_host = actx.to_numpy(centers)
+        targets = actx.to_numpy(int_targets)
         tgt_slice = surf_int_slice
+        target_to_center = actx.to_numpy(target_assoc.target_to_center)
 
-        plt.plot(centers[0], centers[1], "+", color="orange")
+        plt.plot(centers_host[0], centers_host[1], "+", color="orange")
         ax = plt.gca()
 
         for tx, ty, tcenter in zip(
                 targets[0, tgt_slice],
                 targets[1, tgt_slice],
-                target_assoc.target_to_center[tgt_slice]):
+                target_to_center[tgt_slice]):
             if tcenter >= 0:
                 ax.add_artist(
                         plt.Line2D(
-                            (tx, centers[0, tcenter]),
-                            (ty, centers[1, tcenter]),
+                            (tx, centers_host[0, tcenter]),
+                            (ty, centers_host[1, tcenter]),
                             ))
 
         ax.set_aspect("equal")
@@ -381,59 +450,58 @@ def test_target_association(actx_factory, curve_name, curve_f, nelements,
     if visualize:
         visualize_curve_and_assoc()
 
+    # The checks are done on the device and only transfer reduction results.
+    import pyopencl.array as cl_array
+
     # Checks that the targets match with centers on the appropriate side and
     # within the allowable distance.
-    def check_close_targets(centers, targets, true_side,
-                            target_to_center, target_to_side_result,
-                            tgt_slice):
-        targets_have_centers = (target_to_center >= 0).all()
+    def check_close_targets(centers, targets, true_side, target_to_center):
+        targets_have_centers = cl_array.min(target_to_center).get() >= 0
         assert targets_have_centers
 
-        assert (target_to_side_result == true_side).all()
+        # Center side order = -1, 1, -1, 1, ...
+        target_to_center_side = 2 * (target_to_center & 1) - 1
+        assert cl_array.min(target_to_center_side).get() == true_side
+        assert cl_array.max(target_to_center_side).get() == true_side
 
         TOL = 1e-3
-        dists = la.norm((targets.T - centers.T[target_to_center]), axis=1)
-        assert (dists <= (1 + TOL) * expansion_radii[target_to_center]).all()
-
-    # Center side order = -1, 1, -1, 1, ...
-    target_to_center_side = 2 * (target_assoc.target_to_center % 2) - 1
+        dists_squared = sum(
+                (targets[iaxis]
+                    - cl_array.take(centers[iaxis], target_to_center))**2
+                for iaxis in range(ambient_dim))
+        radii = cl_array.take(expansion_radii, target_to_center)
+        assert cl_array.max(dists_squared - ((1 + TOL) * radii)**2).get() <= 0
 
     # interior surface
     check_close_targets(
         centers, surf_targets, -1,
-        target_assoc.target_to_center[surf_int_slice],
-        target_to_center_side[surf_int_slice],
-        surf_int_slice)
+        target_assoc.target_to_center[surf_int_slice])
 
     # exterior surface
     check_close_targets(
         centers, surf_targets, +1,
-        target_assoc.target_to_center[surf_ext_slice],
-        target_to_center_side[surf_ext_slice],
-        surf_ext_slice)
+        target_assoc.target_to_center[surf_ext_slice])
 
     # interior volume
     check_close_targets(
         centers, int_targets, -1,
-        target_assoc.target_to_center[vol_int_slice],
-        target_to_center_side[vol_int_slice],
-        vol_int_slice)
+        target_assoc.target_to_center[vol_int_slice])
 
     # exterior volume
     check_close_targets(
         centers, ext_targets, +1,
-        target_assoc.target_to_center[vol_ext_slice],
-        target_to_center_side[vol_ext_slice],
-        vol_ext_slice)
+        target_assoc.target_to_center[vol_ext_slice])
 
     # Checks that far targets are not assigned a center.
-    assert (target_assoc.target_to_center[far_slice] == -1).all()
+    far_target_to_center = target_assoc.target_to_center[far_slice]
+    assert cl_array.min(far_target_to_center).get() == -1
+    assert cl_array.max(far_target_to_center).get() == -1
 
     # }}}
 
 
-def test_target_association_failure(actx_factory):
-    actx = actx_factory()
+def test_target_association_failure(shared_actx):
+    actx = shared_actx
 
     # {{{ generate circle
 
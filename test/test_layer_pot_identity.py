@@ -21,14 +21,20 @@ THE SOFTWARE.
 """
 
 import pytest
+from functools import partial
 
 import numpy as np
-import numpy.linalg as la
 
-from arraycontext import flatten, unflatten
 from pytential import bind, sym, norm
 from pytential import GeometryCollection
+from pytential.qbx import QBXLayerPotentialSource
+from pytential.qbx.refinement import refine_geometry_collection
+from pytools import memoize_in
+from pytools.convergence import EOCRecorder
 import meshmode.mesh.generation as mgen
+from meshmode.discretization import Discretization
+from meshmode.discretization.poly_element import \
+        InterpolatoryQuadratureSimplexGroupFactory
 from sumpy.kernel import LaplaceKernel, HelmholtzKernel
 # from sumpy.visualization import FieldPlotter
 
@@ -54,8 +60,7 @@ d2 = sym.Derivative()
 
 
 def get_sphere_mesh(refinement_increment, target_order):
-    from meshmode.mesh.generation import generate_sphere
-    return generate_sphere(1, target_order,
+    return mgen.generate_sphere(1, target_order,
             uniform_refinement_rounds=refinement_increment)
 
 
@@ -149,7 +154,6 @@ class ZeroCalderonExpr:
 
         u_sym = sym.var("u")
 
-        from functools import partial
         S = partial(sym.S, qbx_forced_limit=+1)
         Dp = partial(sym.Dp, qbx_forced_limit="avg")
         Sp = partial(sym.Sp, qbx_forced_limit="avg")
@@ -239,15 +243,151 @@ class DynamicTestCase:
             warn("does not achieve sufficient precision")
 
 
+# {{{ analytic solutions
+
+def get_analytic_solution(ambient_dim, k):
+    """
+    :returns: a tuple ``(u, grad_u)`` of symbolic expressions for a solution
+        of the Laplace (if *k* is zero) or Helmholtz equation and its gradient,
+        evaluated on the source nodes.
+    """
+    d = ambient_dim
+    nodes = sym.nodes(d).as_vector()
+
+    if k != 0:
+        if d == 2:
+            angle = 0.3
+            wave_vec = np.array([np.cos(angle), np.sin(angle)])
+            u = sym.exp(1j*k*(wave_vec @ nodes))
+            grad_u = 1j*k*wave_vec*u
+        elif d == 3:
+            center = np.array([3, 1, 2])
+            diff = nodes - center
+            r = sym.cse(sym.sqrt(np.dot(diff, diff)), "r")
+            inv_r = sym.cse(1/r, "inv_r")
+            u = sym.cse(sym.exp(1j*k*r) * inv_r, "u")
+            grad_u = diff * ((1j*k - inv_r)*inv_r*u)
+        else:
+            raise ValueError("invalid dim")
+    else:
+        center = np.array([3, 1, 2])[:d]
+        diff = nodes - center
+        dist_squared = np.dot(diff, diff)
+        dist = sym.sqrt(dist_squared)
+        if d == 2:
+            u = sym.log(dist)
+            grad_u = diff * (1/dist_squared)
+        elif d == 3:
+            inv_dist = 1/dist
+            u = inv_dist
+            grad_u = diff * (-inv_dist*inv_dist*inv_dist)
+        else:
+            raise AssertionError()
+
+    return u, grad_u
+
+# }}}
+
+
+# {{{ geometry cache
+
+def get_mesh(actx, geometry, resolution, target_order):
+    # NOTE: meshes are cached on the array context, so that test cases that
+    # share a geometry (and an array context) do not regenerate them
+    @memoize_in(actx, (get_mesh, "mesh"))
+    def make_mesh(mesh_name, resolution, target_order):
+        return geometry.get_mesh(resolution, target_order)
+
+    return make_mesh(geometry.mesh_name, resolution, target_order)
+
+
+def get_refined_geometry_collection(actx, case, resolution, target_order):
+    # NOTE: the refinement does not depend on the FMM backend, so it is
+    # only performed once for all the backends and the refined
+    # discretization is then reused by each backend's geometry collection
+    @memoize_in(actx, (get_refined_geometry_collection, "refined_places"))
+    def refine_places(mesh_name, resolution, target_order,
+            qbx_order, fmm_order,
+            expansion_stick_out_factor, kernel_length_scale):
+        mesh = get_mesh(actx, case.geometry, resolution, target_order)
+
+        pre_density_discr = Discretization(
+                actx, mesh,
+                InterpolatoryQuadratureSimplexGroupFactory(target_order))
+
+        qbx = QBXLayerPotentialSource(
+                pre_density_discr, 4*target_order,
+                qbx_order,
+                fmm_order=fmm_order,
+                fmm_backend=case.fmm_backend,
+                target_association_tolerance=1.0e-1,
+                _expansions_in_tree_have_extent=True,
+                _expansion_stick_out_factor=expansion_stick_out_factor,
+                )
+        places = GeometryCollection(qbx)
+
+        return refine_geometry_collection(places,
+                kernel_length_scale=kernel_length_scale)
+
+    @memoize_in(actx, (get_refined_geometry_collection, "places"))
+    def make_places(fmm_backend, *args):
+        refined_places = refine_places(*args)
+
+        geometry = refined_places.auto_source.geometry
+        lpot_source = refined_places.get_geometry(geometry)
+        if lpot_source.fmm_backend == fmm_backend:
+            return refined_places
+
+        places = refined_places.copy(places={
+            geometry: lpot_source.copy(fmm_backend=fmm_backend)
+            })
+
+        discr_stage = sym.QBX_SOURCE_STAGE1
+        places._add_discr_to_cache(
+                refined_places._get_discr_from_cache(geometry, discr_stage),
+                geometry, discr_stage)
+        places._add_conn_to_cache(
+                refined_places._get_conn_from_cache(geometry, None, discr_stage),
+                geometry, None, discr_stage)
+
+        return places
+
+    return make_places(case.fmm_backend,
+            case.geometry.mesh_name, resolution, target_order,
+            case.qbx_order, case.fmm_order,
+            getattr(case, "_expansion_stick_out_factor", 0),
+            5 / case.k if case.k else None)
+
+
+def get_bound_op(places, key, make_expr):
+    # NOTE: bound operators are cached on *places*, so that they are only
+    # built once for each refined geometry
+    @memoize_in(places, (get_bound_op, key))
+    def make_bound_op():
+        return bind(places, make_expr())
+
+    return make_bound_op()
+
+# }}}
+
+
 # {{{ integral identity tester
 
+@pytest.fixture(scope="module", autouse=True)
+def _clear_sympy_cache():
+    yield
+
+    # prevent cache 'splosion
+    from sympy.core.cache import clear_cache
+    clear_cache()
+
 
 @pytest.mark.slowtest
 @pytest.mark.parametrize("case", [
         DynamicTestCase(SphereGeometry(), GreenExpr(), 0),
 ])
-def test_identity_convergence_slow(actx_factory, case):
-    test_identity_convergence(actx_factory, case)
+def test_identity_convergence_slow(shared_actx, case):
+    test_identity_convergence(shared_actx, case)
 
 
 @pytest.mark.parametrize("case", [
@@ -265,124 +405,70 @@ def test_identity_convergence_slow(actx_factory, case):
         DynamicTestCase(SphereGeometry(), GreenExpr(), 0, fmm_backend="fmmlib"),
         DynamicTestCase(SphereGeometry(), GreenExpr(), 1.2, fmm_backend="fmmlib")
 ])
-def test_identity_convergence(actx_factory,  case, visualize=False):
+def test_identity_convergence(shared_actx, case, visualize=False):
     logging.basicConfig(level=logging.INFO)
 
     case.check()
 
-    actx = actx_factory()
-
-    # prevent cache 'splosion
-    from sympy.core.cache import clear_cache
-    clear_cache()
+    actx = shared_actx
 
     target_order = 8
 
-    from pytools.convergence import EOCRecorder
+    d = case.geometry.dim
+    k = case.k
+
+    if k == 0:
+        k_sym = LaplaceKernel(d)
+        knl_kwargs = {}
+    else:
+        k_sym = HelmholtzKernel(d)
+        knl_kwargs = {"k": sym.var("k")}
+
+    zero_op = case.expr.get_zero_op(k_sym, **knl_kwargs)
+
+    u_sym, grad_u_sym = get_analytic_solution(d, k)
+    dn_u_sym = np.dot(sym.normal(d).as_vector(), grad_u_sym)
+
+    # NOTE: only the gradient identity needs grad_u on the source
+    needs_grad_u = case.expr.zero_op_name == "grad_green"
+    if needs_grad_u:
+        solution_sym = sym.make_obj_array([u_sym, dn_u_sym, *grad_u_sym])
+    else:
+        solution_sym = sym.make_obj_array([u_sym, dn_u_sym])
+
     eoc_rec = EOCRecorder()
 
     for resolution in (
             getattr(case, "resolutions", None)
             or case.geometry.resolutions
             ):
-        mesh = case.geometry.get_mesh(resolution, target_order)
+        mesh = get_mesh(actx, case.geometry, resolution, target_order)
         if mesh is None:
             break
 
-        d = mesh.ambient_dim
-        k = case.k
-
-        lap_k_sym = LaplaceKernel(d)
-        if k == 0:
-            k_sym = lap_k_sym
-            knl_kwargs = {}
-        else:
-            k_sym = HelmholtzKernel(d)
-            knl_kwargs = {"k": sym.var("k")}
-
-        from meshmode.discretization import Discretization
-        from meshmode.discretization.poly_element import \
-                InterpolatoryQuadratureSimplexGroupFactory
-        from pytential.qbx import QBXLayerPotentialSource
-        pre_density_discr = Discretization(
-                actx, mesh,
-                InterpolatoryQuadratureSimplexGroupFactory(target_order))
-
-        qbx = QBXLayerPotentialSource(
-                pre_density_discr, 4*target_order,
-                case.qbx_order,
-                fmm_order=case.fmm_order,
-                fmm_backend=case.fmm_backend,
-                target_association_tolerance=1.0e-1,
-                _expansions_in_tree_have_extent=True,
-                _expansion_stick_out_factor=getattr(
-                    case, "_expansion_stick_out_factor", 0),
-                )
-        places = GeometryCollection(qbx)
-
-        from pytential.qbx.refinement import refine_geometry_collection
-        kernel_length_scale = 5 / case.k if case.k else None
-        places = refine_geometry_collection(places,
-                kernel_length_scale=kernel_length_scale)
+        places = get_refined_geometry_collection(
+                actx, case, resolution, target_order)
 
         # {{{ compute values of a solution to the PDE
 
         density_discr = places.get_discretization(places.auto_source.geometry)
-        ambient_dim = places.ambient_dim
-
-        nodes_host = actx.to_numpy(
-                flatten(density_discr.nodes(), actx)
-                ).reshape(ambient_dim, -1)
-        normal = bind(places, sym.normal(d))(actx).as_vector(object)
-        normal_host = actx.to_numpy(flatten(normal, actx)).reshape(ambient_dim, -1)
-
-        if k != 0:
-            if d == 2:
-                angle = 0.3
-                wave_vec = np.array([np.cos(angle), np.sin(angle)])
-                u = np.exp(1j*k*np.tensordot(wave_vec, nodes_host, axes=1))
-                grad_u = 1j*k*wave_vec[:, np.newaxis]*u
-            elif d == 3:
-                center = np.array([3, 1, 2])
-                diff = nodes_host - center[:, np.newaxis]
-                r = la.norm(diff, axis=0)
-                u = np.exp(1j*k*r) / r
-                grad_u = diff * (1j*k*u/r - u/r**2)
-            else:
-                raise ValueError("invalid dim")
-        else:
-            center = np.array([3, 1, 2])[:d]
-            diff = nodes_host - center[:, np.newaxis]
-            dist_squared = np.sum(diff**2, axis=0)
-            dist = np.sqrt(dist_squared)
-            if d == 2:
-                u = np.log(dist)
-                grad_u = diff/dist_squared
-            elif d == 3:
-                u = 1/dist
-                grad_u = -diff/dist**3
-            else:
-                raise AssertionError()
-
-        dn_u = 0
-        for i in range(d):
-            dn_u = dn_u + normal_host[i]*grad_u[i]
 
-        # }}}
+        u_dev, dn_u_dev, *grad_u_dev = get_bound_op(places,
+                ("solution", k, needs_grad_u), lambda: solution_sym)(actx)
 
-        u_dev = unflatten(
-                normal[0], actx.from_numpy(u), actx, strict=False)
-        dn_u_dev = unflatten(
-                normal[0], actx.from_numpy(dn_u), actx, strict=False)
-        grad_u_dev = unflatten(
-                normal, actx.from_numpy(grad_u.ravel()), actx, strict=False)
+        solution = {"u": u_dev, "dn_u": dn_u_dev}
+        if needs_grad_u:
+            solution["grad_u"] = sym.make_obj_array(grad_u_dev)
+
+        # }}}
 
         key = (case.qbx_order, case.geometry.mesh_name, resolution,
                 case.expr.zero_op_name)
 
-        bound_op = bind(places, case.expr.get_zero_op(k_sym, **knl_kwargs))
-        error = bound_op(
-                actx, u=u_dev, dn_u=dn_u_dev, grad_u=grad_u_dev, k=case.k)
+        bound_op = get_bound_op(places,
+                ("zero_op", case.expr.zero_op_name, k_sym),
+                lambda: zero_op)
+        error = bound_op(actx, k=case.k, **solution)
         if 0:
             pt.plot(error)
             pt.show()
@@ -391,7 +477,8 @@ def test_identity_convergence(actx_factory,  case, visualize=False):
         logger.info("---> key %s error %.5e", key, linf_error_norm)
 
         h_max = actx.to_numpy(
-                bind(places, sym.h_max(qbx.ambient_dim))(actx)
+                get_bound_op(places, "h_max",
+                    lambda: sym.h_max(d))(actx)
                 )
         eoc_rec.add_data_point(h_max, linf_error_norm)
 
@@ -399,7 +486,8 @@ def test_identity_convergence(actx_factory,  case, visualize=False):
             from meshmode.discretization.visualization import make_visualizer
             bdry_vis = make_visualizer(actx, density_discr, target_order)
 
-            bdry_normals = bind(places, sym.normal(mesh.ambient_dim))(actx)\
+            bdry_normals = get_bound_op(places, "normal",
+                    lambda: sym.normal(d))(actx)\
                     .as_vector(dtype=object)
 
             bdry_vis.write_vtk_file("source-%s.vtu" % resolution, [